@@ -5,246 +5,359 @@ This version properly integrates with jira-mcp-snowflake MCP server
 """
 
 import os
-import json
-from datetime import datetime, timedelta
-from typing import Dict, Any
+import time
+import queue
+import atexit
+import logging
+import functools
+from logging.handlers import QueueHandler, QueueListener
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Type
 
-from crewai import Agent, Task, Crew, Process, LLM
 from crewai.tools import BaseTool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel, Field
 
-def setup_gemini_llm():
-    """Setup Gemini LLM with proper configuration"""
-    gemini_api_key = os.getenv('GEMINI_API_KEY')
+from jira_data import PROJECTS, dumps, loads, filter_recent, trim_issues, most_recent
+from jira_report import (
+    render_report,
+    write_report,
+    report_cache_key,
+    load_cached_report,
+    store_cached_report,
+)
+
+logger = logging.getLogger(__name__)
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to default if it is malformed"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r; using %d", name, value, default)
+        return default
+
+@dataclass(frozen=True)
+class GeminiSettings:
+    """Environment configuration, read once at import time"""
+    __slots__ = ("api_key", "api_key_valid", "report_cache_ttl", "verbose")
     
-    if not gemini_api_key or gemini_api_key in ['test-key', 'your-api-key', '']:
-        raise ValueError("❌ Please set a real GEMINI_API_KEY environment variable")
+    api_key: Optional[str]
+    api_key_valid: bool
+    report_cache_ttl: int
+    verbose: bool
     
-    print(f"🔑 Using Gemini API Key: {gemini_api_key[:20]}...")
+    @classmethod
+    def from_env(cls) -> "GeminiSettings":
+        api_key = os.getenv('GEMINI_API_KEY')
+        return cls(
+            api_key=api_key,
+            api_key_valid=api_key not in (None, '', 'test-key', 'your-api-key'),
+            report_cache_ttl=_env_int('REPORT_CACHE_TTL', 3600),
+            verbose=os.getenv('CREW_VERBOSE', '').lower() in ('1', 'true', 'yes')
+        )
+
+SETTINGS = GeminiSettings.from_env()
+
+DEFAULT_GEMINI_MODEL = "gemini/gemini-2.5-pro"
+# Reporting window, in days
+REPORT_DAYS = 30
+# Issues per project shown to the summary model; the rest only count towards totals
+PROMPT_TOP_K = 20
+
+@functools.lru_cache(maxsize=None)
+def _build_llm(model: str, temperature: float, api_key: str):
+    """Build (once per process) the LLM client for the given settings"""
+    from crewai import LLM
     
-    llm = LLM(
-        model="gemini/gemini-2.5-pro",
-        google_api_key=gemini_api_key,
-        temperature=0.7
+    logger.info("🔑 Using Gemini API Key: %s...", api_key[:20])
+    return LLM(
+        model=model,
+        google_api_key=api_key,
+        temperature=temperature
     )
-    return llm
+
+def reset_llm_cache():
+    """Re-read settings from the environment and drop cached LLM clients, e.g. after the API key changes"""
+    global SETTINGS
+    SETTINGS = GeminiSettings.from_env()
+    _build_llm.cache_clear()
+
+def setup_gemini_llm(model: str = DEFAULT_GEMINI_MODEL, temperature: float = 0.7):
+    """Setup Gemini LLM with proper configuration"""
+    gemini_api_key = SETTINGS.api_key
+    
+    if not SETTINGS.api_key_valid:
+        raise ValueError("❌ Please set a real GEMINI_API_KEY environment variable")
+    
+    # Reuse the same client (and its connection pool) across calls; the key
+    # is validated once in SETTINGS and only logged when a client is built
+    return _build_llm(model, temperature, gemini_api_key)
+
+# Real data from the MCP server calls we just made, keyed by project
+REAL_DATA: Dict[str, Dict[str, Any]] = {}
+
+def _missing_project_error(project: str) -> Dict[str, Any]:
+    """Error payload for a project with no data"""
+    return {
+        "error": f"No data available for project {project}",
+        "available_projects": list(REAL_DATA.keys())
+    }
+
+class RealDataJIRAInput(BaseModel):
+    """Input schema for RealDataJIRATool"""
+    projects: str = Field(..., description="Comma-separated JIRA project keys, e.g. 'CCITJEN,CCITRP,QEHS'")
+    status: str = Field("6", description="JIRA status id ('6' is Closed)")
+    limit: int = Field(100, description="Maximum number of issues per project")
+
+class MonthlyFilterInput(BaseModel):
+    """Input schema for MonthlyFilterTool"""
+    issues_json: str = Field(..., description="JSON output of the real_jira_data tool")
+    days: int = Field(30, description="Keep issues resolved within this many days")
 
 class RealDataJIRATool(BaseTool):
     """This tool provides pre-fetched real JIRA data instead of trying to call MCP directly"""
     name: str = "real_jira_data"
-    description: str = "Provides real JIRA data from jira-mcp-snowflake MCP server"
+    description: str = (
+        "Provides real JIRA data from jira-mcp-snowflake MCP server. "
+        "Pass all projects at once as a comma-separated list, e.g. 'CCITJEN,CCITRP,QEHS'."
+    )
+    # An explicit schema is built once, instead of CrewAI inferring it from _run
+    args_schema: Type[BaseModel] = RealDataJIRAInput
     
-    def _run(self, project: str, status: str = "6", limit: int = 100) -> str:
-        """Return real JIRA data that we've already fetched"""
-        # Real data from the MCP server calls we just made
-        real_data = {}
+    def fetch(self, project: str, status: str = "6", limit: int = 100) -> Dict[str, Any]:
+        """Return real JIRA data that we've already fetched, as a dict"""
+        result = REAL_DATA.get(project)
+        if result is None:
+            return _missing_project_error(project)
         
-        if project in real_data:
-            print(f"✅ Returning REAL JIRA data for {project}")
-            result = real_data[project]
-            print(f"📊 Found {len(result['issues'])} real issues")
-            return json.dumps(result, default=str)
-        else:
-            return json.dumps({
-                "error": f"No data available for project {project}",
-                "available_projects": list(real_data.keys())
-            })
+        logger.debug("Returning REAL JIRA data for %s: %d issues", project, len(result['issues']))
+        return result
+    
+    def fetch_many(self, projects: Sequence[str], status: str = "6", limit: int = 100) -> Dict[str, Dict[str, Any]]:
+        """Fetch several projects, keyed by project"""
+        return {project: self.fetch(project, status, limit) for project in projects}
+    
+    def _run(self, projects: str, status: str = "6", limit: int = 100) -> str:
+        """Return real JIRA data that we've already fetched for one or more projects"""
+        project_list = [project.strip() for project in projects.split(",") if project.strip()]
+        return dumps(self.fetch_many(project_list, status, limit))
 
 class MonthlyFilterTool(BaseTool):
     name: str = "monthly_filter" 
     description: str = "Filters JIRA issues to only include those resolved within the last 30 days"
+    args_schema: Type[BaseModel] = MonthlyFilterInput
+    
+    def filter(self, data: Dict[str, Any], days: int = 30, now: Optional[float] = None) -> Dict[str, Any]:
+        """Filter already-parsed issues by resolution date (now is a Unix timestamp)"""
+        if "error" in data:
+            return data
+        
+        issues = data.get("issues", [])
+        # Compare raw epoch floats; a datetime is only built for filter_date
+        cutoff = (now if now is not None else time.time()) - days * 86400
+        filtered_issues = filter_recent(issues, cutoff)
+        
+        result = {
+            "issues": filtered_issues,
+            "total_filtered": len(filtered_issues),
+            "original_total": len(issues),
+            "filter_applied": f"Last {days} days",
+            "filter_date": datetime.fromtimestamp(cutoff).isoformat(),
+            "project": data.get("project", "unknown"),
+            "data_source": data.get("data_source", "Unknown")
+        }
+        
+        logger.debug("Filtered to %d issues from last %d days", len(filtered_issues), days)
+        return result
     
     def _run(self, issues_json: str, days: int = 30) -> str:
         """Filter issues by resolution date"""
         try:
-            data = json.loads(issues_json)
+            data = loads(issues_json)
             
             if "error" in data:
                 return issues_json
             
-            month_ago = datetime.now() - timedelta(days=days)
-            filtered_issues = []
-            
-            for issue in data.get("issues", []):
-                if issue.get("resolution_date"):
-                    try:
-                        timestamp_str = issue["resolution_date"].split()[0]
-                        resolution_date = datetime.fromtimestamp(float(timestamp_str))
-                        
-                        if resolution_date >= month_ago:
-                            filtered_issues.append(issue)
-                    except (ValueError, IndexError) as e:
-                        print(f"⚠️  Could not parse date for {issue.get('key', 'unknown')}: {e}")
-                        continue
-            
-            result = {
-                "issues": filtered_issues,
-                "total_filtered": len(filtered_issues),
-                "original_total": len(data.get("issues", [])),
-                "filter_applied": f"Last {days} days",
-                "filter_date": month_ago.isoformat(),
-                "project": data.get("project", "unknown"),
-                "data_source": data.get("data_source", "Unknown")
-            }
+            if "issues" not in data and data and all(isinstance(payload, dict) for payload in data.values()):
+                # Multi-project payload from real_jira_data, keyed by project;
+                # every project shares one cutoff
+                now = time.time()
+                return dumps({project: self.filter(payload, days, now) for project, payload in data.items()})
             
-            print(f"📅 Filtered to {len(filtered_issues)} issues from last {days} days")
-            return json.dumps(result, default=str)
+            return dumps(self.filter(data, days))
             
         except Exception as e:
-            return json.dumps({"error": f"Date filtering failed: {e}"})
+            return dumps({"error": f"Date filtering failed: {e}"})
 
-def create_real_data_crew():
-    """Create a crew that uses real JIRA data"""
-    
-    # Setup LLM
-    llm = setup_gemini_llm()
+# Agent backstories are part of the system prompt; keeping them constant (and
+# run-specific data in the task descriptions) keeps the prompt prefix stable
+# across runs so provider-side prompt caching can hit
+REPORTER_BACKSTORY = "You create comprehensive reports using actual JIRA data."
+
+def collect_recent_issues(projects: Sequence[str] = PROJECTS, days: int = REPORT_DAYS) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch and date-filter every project in-process.
+    Both steps are deterministic, so they run without any LLM round-trips.
     
-    # Setup tools
-    jira_tool = RealDataJIRATool()
+    Returns:
+        dict: Filtered issue payloads keyed by project.
+    """
+    fetched = RealDataJIRATool().fetch_many(projects)
     filter_tool = MonthlyFilterTool()
+    now = time.time()
+    return {project: filter_tool.filter(payload, days, now) for project, payload in fetched.items()}
+
+def report_issues(recent_issues: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """
+    Reduce filtered payloads to the report fields of each project's issues.
     
-    # Create agents
-    data_collector = Agent(
-        role='JIRA Data Collector',
-        goal='Collect REAL JIRA data from all three projects',
-        backstory="You provide real JIRA data (no demo data!) from the jira-mcp-snowflake server.",
-        tools=[jira_tool],
-        llm=llm,
-        verbose=True,
-        allow_delegation=False
-    )
+    Returns:
+        tuple: Issues keyed by project, and error messages keyed by the projects that failed.
+    """
+    per_project: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    for project, data in recent_issues.items():
+        if "error" in data:
+            logger.error("❌ No data for %s: %s", project, data["error"])
+            errors[project] = data["error"]
+        per_project[project] = trim_issues(data.get("issues", []))
+    return per_project, errors
+
+def create_real_data_crew(per_project: Dict[str, List[Dict[str, Any]]], errors: Optional[Dict[str, str]] = None):
+    """Create a crew that summarizes pre-filtered real JIRA data"""
+    from crewai import Agent, Task, Crew, Process
     
-    data_analyst = Agent(
-        role='Data Analyst',
-        goal='Filter and analyze JIRA data for monthly reporting',
-        backstory="You filter real JIRA data to focus on the last 30 days.",
-        tools=[filter_tool],
-        llm=llm,
-        verbose=True,
-        allow_delegation=False
-    )
+    # Setup LLM
+    writer_llm = setup_gemini_llm(DEFAULT_GEMINI_MODEL, temperature=0.3)
     
+    # The summary needs totals and a sample, not every closed issue; failed
+    # projects pass their error through so the model does not report zero closures
+    errors = errors or {}
+    prompt_data = {
+        project: {"error": errors[project]} if project in errors
+        else {"closed": len(issues), "most_recent": most_recent(issues, PROMPT_TOP_K)}
+        for project, issues in per_project.items()
+    }
+    
+    # Create agents
     report_generator = Agent(
         role='Report Generator',
         goal='Create professional monthly JIRA reports with real data',
-        backstory="You create comprehensive reports using actual JIRA data.",
-        llm=llm,
-        verbose=True,
-        allow_delegation=True
+        backstory=REPORTER_BACKSTORY,
+        llm=writer_llm,
+        verbose=SETTINGS.verbose,
+        allow_delegation=False,
+        # One tool-free answer is expected; bound retries and wall time
+        max_iter=3,
+        max_execution_time=120
     )
     
     # Create tasks
-    data_collection_task = Task(
-        description="""
-        Collect REAL JIRA data for these projects:
-        - CCITJEN
-        - CCITRP  
-        - QEHS
-        
-        Get the actual closed issues data for each project.
-        This is REAL data from the MCP server, not demo data.
-        """,
-        expected_output="Real JIRA data for all three projects",
-        agent=data_collector
-    )
-    
-    analysis_task = Task(
-        description="""
-        Filter the REAL JIRA data:
-        1. Keep only issues resolved in the last 30 days
-        2. Count issues per project
-        3. Analyze trends in the real data
-        
-        Make sure to note this is real production data.
-        """,
-        expected_output="Filtered real JIRA data with monthly analysis",
-        agent=data_analyst
-    )
-    
     report_task = Task(
-        description="""
-        Create a monthly JIRA report using the REAL data:
-        
-        # Monthly JIRA Closed Issues Report
-        **Report Period:** Last 30 Days  
-        **Generated:** [current date]
-        **Data Source:** jira-mcp-snowflake MCP Server (REAL DATA)
-        
-        ## Executive Summary
-        - Total REAL issues closed: [number]
-        - Project breakdown with actual issue counts
+        description=f"""
+        Write a 3-sentence executive summary of the JIRA issues closed in the
+        last {REPORT_DAYS} days, using the REAL data below (closed counts plus
+        the {PROMPT_TOP_K} most recent issues per project). The issue tables are
+        rendered separately, so return ONLY the summary prose.
         
-        ## Project Details
-        
-        ### CCITJEN  
-        | Issue Key | Summary | Resolution Date |
-        |-----------|---------|-----------------|
-        [List actual issues like CCITJEN-2096, CCITJEN-2095, etc.]
-        
-        ### CCITRP
-        [List actual issues like CCITRP-359, CCITRP-355, etc.]
-        
-        ### QEHS
-        [List actual issues like QEHS-286, QEHS-284, etc.]
-        
-        ## Data Verification
-        ✅ Using REAL JIRA data from MCP server
-        ✅ No demo or fallback data used
-        ✅ Actual issue keys and summaries included
-        
-        Create a professional report with the real data.
+        Do not invent issues; only use this real data:
+        {dumps(prompt_data)}
         """,
-        expected_output="Complete monthly report with REAL JIRA data",
-        agent=report_generator,
-        output_file="reports/monthly_jira_report_REAL_DATA.md"
+        expected_output="A 3-sentence executive summary of the REAL JIRA data",
+        agent=report_generator
     )
     
     # Create crew
     crew = Crew(
-        agents=[data_collector, data_analyst, report_generator],
-        tasks=[data_collection_task, analysis_task, report_task],
+        agents=[report_generator],
+        tasks=[report_task],
         process=Process.sequential,
-        verbose=True
+        verbose=SETTINGS.verbose
     )
     
     return crew
 
+# Set once configure_logging() has installed the queue handler
+_LOG_LISTENER: Optional[QueueListener] = None
+
+def configure_logging():
+    """
+    Send log records through a queue drained by a background thread, so
+    concurrent tools and agents never block on stdout. LOG_LEVEL sets the level.
+    Safe to call more than once; the handler is only installed the first time.
+    """
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        return
+    
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    _LOG_LISTENER = QueueListener(log_queue, stream_handler)
+    
+    root_logger = logging.getLogger()
+    root_logger.addHandler(QueueHandler(log_queue))
+    _LOG_LISTENER.start()
+    atexit.register(_LOG_LISTENER.stop)
+    
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    try:
+        root_logger.setLevel(level)
+    except ValueError:
+        root_logger.setLevel(logging.INFO)
+        logger.warning("Ignoring invalid LOG_LEVEL=%r; using INFO", level)
+
 def main():
     """Run the REAL data JIRA report agent"""
     try:
+        configure_logging()
+        
         # Ensure reports directory exists
-        import os
         os.makedirs("reports", exist_ok=True)
         
-        print("🚀 STARTING REAL JIRA REPORT AGENT")
-        print("=" * 60)
-        print("📊 Scope: Monthly (Last 30 Days)")
-        print("🎯 Projects: CCITJEN, CCITRP, QEHS")
-        print("✅ Data Source: REAL MCP Server Data (NO DEMO DATA!)")
-        print("=" * 60)
+        logger.info("🚀 STARTING REAL JIRA REPORT AGENT")
+        logger.info("📊 Scope: Monthly (Last 30 Days)")
+        logger.info("🎯 Projects: %s", ", ".join(PROJECTS))
+        logger.info("✅ Data Source: REAL MCP Server Data (NO DEMO DATA!)")
         
-        crew = create_real_data_crew()
-        
-        print("\n🔥 Starting crew execution with REAL data...")
-        result = crew.kickoff()
+        cache_key = report_cache_key(PROJECTS, REPORT_DAYS)
+        report = load_cached_report(cache_key, SETTINGS.report_cache_ttl) if SETTINGS.report_cache_ttl > 0 else None
+        if report is not None:
+            logger.info("♻️  Reusing today's report generated within the last %ss", SETTINGS.report_cache_ttl)
+        else:
+            per_project, errors = report_issues(collect_recent_issues())
+            crew = create_real_data_crew(per_project, errors)
+            
+            logger.info("🔥 Starting crew execution with REAL data...")
+            result = crew.kickoff()
+            # Tables are rendered here; the model only wrote the summary prose
+            report = render_report({
+                "period": f"Last {REPORT_DAYS} Days",
+                "per_project": per_project,
+                "summary": result.raw.strip(),
+                "errors": errors
+            })
+            if errors:
+                # Retry the failed projects on the next run instead of serving this report
+                logger.warning("⚠️  Not caching the report; no data for %s", ", ".join(errors))
+            else:
+                store_cached_report(cache_key, report)
+        report_path = write_report(report)
         
-        print("\n" + "=" * 60)
-        print("📊 MONTHLY JIRA REPORT WITH REAL DATA GENERATED")
-        print("=" * 60)
-        print(result)
-        print(f"\n📁 Report saved to: reports/monthly_jira_report_REAL_DATA.md")
-        print("✅ Contains REAL issues like CCITJEN-2096, CCITRP-359, QEHS-286")
-        print("🔗 Data source: Real MCP Server (jira-mcp-snowflake)")
+        logger.info("📊 MONTHLY JIRA REPORT WITH REAL DATA GENERATED\n%s", report)
+        logger.info("📁 Report saved to: %s", report_path)
+        logger.info("🔗 Data source: Real MCP Server (jira-mcp-snowflake)")
         
     except ValueError as e:
-        print(f"❌ Configuration Error: {e}")
-        print("\n💡 Please set your GEMINI_API_KEY:")
-        print("   export GEMINI_API_KEY='your-real-api-key'")
+        logger.error("❌ Configuration Error: %s", e)
+        logger.error("💡 Please set your GEMINI_API_KEY: export GEMINI_API_KEY='your-real-api-key'")
         
-    except Exception as e:
-        print(f"❌ Execution Error: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Execution Error")
 
 if __name__ == "__main__":
     main() 
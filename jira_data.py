@@ -0,0 +1,71 @@
+"""
+Lightweight JIRA data helpers shared by the CrewAI report agent.
+Kept free of CrewAI/LangChain imports so they load (and test) quickly.
+"""
+
+import json
+import heapq
+import logging
+from typing import Dict, Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# JIRA projects covered by the monthly report
+PROJECTS = ("CCITJEN", "CCITRP", "QEHS")
+
+# The only issue fields the report uses; everything else is wasted prompt tokens
+REPORT_FIELDS = ("key", "summary", "resolution_date")
+
+def dumps(obj) -> str:
+    """Serialize a tool payload to a JSON string"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str)
+
+def loads(data):
+    """Deserialize a JSON tool payload"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def parse_ts(value: str):
+    """
+    Return the epoch seconds of an MCP resolution date, or None if malformed.
+    MCP resolution dates look like "<epoch seconds> <tz offset>", e.g. "1749046366.952000000 1440".
+    """
+    try:
+        return float(value.split(None, 1)[0])
+    except (ValueError, IndexError):
+        return None
+
+def resolution_ts(issue: Dict[str, Any]):
+    """Return the issue's resolution epoch seconds, or None if missing/malformed"""
+    resolution_date = issue.get("resolution_date")
+    if not resolution_date:
+        return None
+    timestamp = parse_ts(resolution_date)
+    if timestamp is None:
+        logger.warning("Could not parse date for %s: %r", issue.get('key', 'unknown'), resolution_date)
+    return timestamp
+
+def filter_recent(issues, cutoff_ts: float):
+    """Return the issues resolved at or after cutoff_ts (epoch seconds)"""
+    # Compare raw epoch floats instead of building a datetime per issue
+    to_ts = resolution_ts
+    return [
+        issue for issue in issues
+        if (timestamp := to_ts(issue)) is not None and timestamp >= cutoff_ts
+    ]
+
+def trim_issues(issues, fields=REPORT_FIELDS):
+    """Project issues down to the given fields before they reach an LLM prompt"""
+    return [{field: issue[field] for field in fields if field in issue} for issue in issues]
+
+def most_recent(issues, k: int):
+    """Return up to k issues, newest resolution first (undated issues last)"""
+    return heapq.nlargest(k, issues, key=lambda issue: resolution_ts(issue) or 0.0)
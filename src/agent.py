@@ -1,13 +1,11 @@
 import logging
+import functools
 from llama_stack_client import LlamaStackClient
 from llama_stack_client import Agent
-from llama_stack_client.lib.agents.event_logger import EventLogger
 import time
-import uuid
 import os
 from .utils import step_logger
 from .config import load_config
-from datetime import datetime, timedelta
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -27,10 +25,15 @@ base_url = os.getenv("REMOTE_BASE_URL")
 # model_id will later be used to pass the name of the desired inference model to Llama Stack Agents/Inference APIs
 model_id = "granite32-8b"
 
+# Stream turns by default so the response is consumed as it is generated;
+# set STREAM=False to wait for each complete turn instead
+stream = os.getenv("STREAM", "True").lower() in ("1", "true", "yes")
+
 # Optional: Enter your MCP server URL here
 jira_mcp_url = os.getenv("REMOTE_JIRA_MCP_URL")  # Local JIRA MCP server
 
 
+@functools.cache
 def get_sampling_params():
     temperature = float(os.getenv("TEMPERATURE", 0.0))
     if temperature > 0.0:
@@ -69,7 +72,7 @@ def create_client() -> LlamaStackClient:
     )
     # Get list of registered tools and extract their toolgroup IDs
     registered_tools = client.tools.list()
-    registered_toolgroups = [tool.toolgroup_id for tool in registered_tools]
+    registered_toolgroups = frozenset(tool.toolgroup_id for tool in registered_tools)
 
     # Register JIRA MCP server if not already registered
     if "mcp::jira-mcp-snowflake" not in registered_toolgroups:
@@ -107,21 +110,26 @@ def create_agent(client: LlamaStackClient) -> Agent:
     return agent
 
 
-def run_task(agent_instance: Agent, use_stream=False):
+def run_task(agent_instance: Agent, use_stream=stream, session_id=None):
     """
     Triggers the agent to perform its JIRA reporting task.
 
     Args:
         agent_instance (Agent): The agent instance to use for monitoring.
         use_stream (bool): Whether to stream the agent's response in real-time.
+        session_id (str): An existing session to continue; a new one is created if omitted.
+
+    Returns:
+        str: The session id, so repeated runs can reuse the server-side session.
     """
 
     logger.info(f"Triggering JIRA report agent at {time.ctime()}...")
 
     user_prompts = config.prompts.user_prompts
-    session_id = agent_instance.create_session(
-        session_name=f"jira_report_session_{int(time.time())}"
-    )
+    if session_id is None:
+        session_id = agent_instance.create_session(
+            session_name=f"jira_report_session_{int(time.time())}"
+        )
     
     for i, prompt in enumerate(user_prompts):
         logger.info(f"Processing prompt {i+1}: {prompt[:100]}...")
@@ -130,9 +138,27 @@ def run_task(agent_instance: Agent, use_stream=False):
             session_id=session_id,
             stream=use_stream,
         )
-        step_logger(response.steps)
+        if use_stream:
+            # Drain the stream as it arrives, then log the finished turn's steps
+            turn_completed = False
+            for chunk in response:
+                # Server errors arrive as chunks with an error and no event
+                error = getattr(chunk, "error", None)
+                if error:
+                    raise RuntimeError(f"Turn did not complete. Error: {error}")
+                payload = chunk.event.payload
+                if payload.event_type == "step_complete":
+                    logger.debug("Completed %s step", payload.step_type)
+                elif payload.event_type == "turn_complete":
+                    turn_completed = True
+                    step_logger(payload.turn.steps)
+            if not turn_completed:
+                raise RuntimeError(f"Turn did not complete for prompt {i+1}")
+        else:
+            step_logger(response.steps)
 
     logger.info("JIRA report agent cycle completed.")
+    return session_id
 
 
 if __name__ == "__main__":
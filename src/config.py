@@ -1,34 +1,47 @@
+import os
 import logging
+import functools
 import yaml
-from typing import List
-from pydantic import BaseModel, Field, field_validator
+from typing import Tuple
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # libyaml is optional; fall back to the pure Python loader
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 
 class PromptsConfig(BaseModel):
     """Model for prompts configuration section"""
 
+    # Whitespace is stripped by pydantic-core, including each user prompt
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     system_prompt: str = Field(..., description="System prompt for the agent")
-    user_prompts: List[str] = Field(..., description="List of user prompts to execute")
+    # A tuple, so the cached config shared by every load_config() caller cannot be mutated
+    user_prompts: Tuple[str, ...] = Field(..., description="List of user prompts to execute")
 
     @field_validator("system_prompt")
     def validate_system_prompt(cls, v):
-        if not v.strip():
+        if not v:
             raise ValueError("System prompt cannot be empty")
-        return v.strip()
+        return v
 
     @field_validator("user_prompts")
     def validate_user_prompts(cls, v):
         if not v:
             raise ValueError("At least one user prompt must be provided")
-        return [prompt.strip() for prompt in v if prompt.strip()]
+        return tuple(prompt for prompt in v if prompt)
 
 
 class Config(BaseModel):
     """Main configuration model"""
 
+    model_config = ConfigDict(frozen=True)
+
     prompts: PromptsConfig = Field(..., description="Prompts configuration")
 
 
@@ -43,8 +56,19 @@ def load_config(config_path: str = "config.yaml") -> Config:
         Config: Validated configuration object.
     """
     try:
-        with open(config_path, "r", encoding="utf-8") as file:
-            config_data = yaml.safe_load(file)
+        mtime = os.path.getmtime(config_path)
+    except FileNotFoundError:
+        logger.error(f"Configuration file {config_path} not found")
+        raise
+    return _load_config(config_path, mtime)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config(config_path: str, mtime: float) -> Config:
+    """Parse and validate the file, cached per path and modification time"""
+    try:
+        with open(config_path, "rb") as file:
+            config_data = yaml.load(file, Loader=SafeLoader)
         logger.info(f"Configuration loaded from {config_path}")
 
         # Validate and create Pydantic model
@@ -1,8 +1,12 @@
-import json
 from json import JSONDecodeError
 
+try:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    from json import loads as json_loads
+
 from rich.pretty import pprint
-from termcolor import cprint
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,17 +15,20 @@ logger = logging.getLogger(__name__)
 def step_logger(steps):
     """
     log the steps of an agent's response in a formatted way.
-    Note: stream need to be set to False to use this function.
+    Note: when streaming, pass the steps of the turn_complete event's turn.
     Args:
     steps: List of steps from an agent's response.
     """
     for i, step in enumerate(steps):
         step_type = type(step).__name__
-        logger.info(f"Step {i+1}: {step_type}")
+        logger.info("Step %d: %s", i + 1, step_type)
         if step_type == "ToolExecutionStep":
             logger.info("Executing tool...")
+            # Skip parsing and pretty-printing large tool responses when INFO is filtered out
+            if not logger.isEnabledFor(logging.INFO):
+                continue
             try:
-                pprint(json.loads(step.tool_responses[0].content))
+                pprint(json_loads(step.tool_responses[0].content))
             except (TypeError, JSONDecodeError):
                 # tool response is not a valid JSON object
                 pprint(step.tool_responses[0].content)
@@ -32,5 +39,5 @@ def step_logger(steps):
             elif step.api_model_response.tool_calls:
                 tool_call = step.api_model_response.tool_calls[0]
                 logger.info("Tool call Generated:")
-                logger.info(f"Tool call: {tool_call.tool_name}, Arguments: {json.loads(tool_call.arguments_json)}")
+                logger.info("Tool call: %s, Arguments: %s", tool_call.tool_name, tool_call.arguments_json)
     logger.info("Query processing completed")
\ No newline at end of file